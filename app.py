@@ -1,23 +1,63 @@
-from flask import Flask, jsonify, request, send_file
+# Patch sockets for cooperative IO before boto3/pymysql/requests are imported.
+# Production runs under: gunicorn -k gevent -w 4 --worker-connections 200 app:app
+try:
+    from gevent import monkey
+    monkey.patch_all()
+except ImportError:
+    pass
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from flask_caching import Cache
+from flask_compress import Compress
 import boto3
+import requests
+from requests.adapters import HTTPAdapter
 from botocore.exceptions import ClientError
 import logging
 import pymysql
+from dbutils.pooled_db import PooledDB
 import os
-from io import BytesIO
 import random
-import json
-from datetime import datetime
+import re
+import orjson
+import functools
+import gzip
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
 
 # AWS Clients
+# Persist clients between requests - cached creds live on the client.
 sqs_client = boto3.client('sqs', region_name='us-east-1')
 sns_client = boto3.client('sns', region_name='us-east-1')
+lambda_client = boto3.client('lambda', region_name='us-east-1')
 
 # Environment variables
 SQS_QUEUE_URL = os.getenv('SQS_QUEUE_URL')
 SNS_TOPIC_ARN = os.getenv('SNS_TOPIC_ARN')
 
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify and request.json)"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NAIVE_UTC).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache'})
+
+# Compress JSON/HTML responses over 500 bytes for clients that accept it.
+# Streamed responses (S3 downloads) are left alone: compressing them would
+# buffer the whole body in memory before the first byte is sent.
+app.config['COMPRESS_MIN_SIZE'] = 500
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -31,78 +71,197 @@ RDS_PASSWORD = os.getenv('RDS_PASSWORD')
 RDS_DATABASE = os.getenv('RDS_DATABASE', 'images_db')
 S3_BUCKET = os.getenv('S3_BUCKET', 'martin-aleksiev-bucket-603196661040')
 
-def get_db_connection():
-    """Get connection to RDS MySQL database"""
+# Read-only endpoints use the replica when RDS_READ_HOST is set
+RDS_READ_HOST = os.getenv('RDS_READ_HOST') or RDS_HOST
+
+def _create_db_pool(host, **connect_args):
+    """Pool of warm RDS connections; close() hands a connection back to the pool"""
+    return PooledDB(
+        creator=pymysql,
+        host=host,
+        user=RDS_USER,
+        password=RDS_PASSWORD,
+        database=RDS_DATABASE,
+        maxconnections=20,
+        blocking=True,
+        ping=1,
+        **connect_args
+    )
+
+WRITE_POOL = _create_db_pool(RDS_HOST)
+
+# Without a replica, reads share the write pool so the per-worker connection
+# limit on the primary stays at 20. Pooled connections are rolled back when
+# returned, so a read never keeps its snapshot past the request.
+if RDS_READ_HOST == RDS_HOST:
+    READ_POOL = WRITE_POOL
+else:
+    READ_POOL = _create_db_pool(RDS_READ_HOST, autocommit=True)
+
+def get_db_connection(readonly=False):
+    """Get pooled connection to RDS MySQL database (the read replica if readonly)"""
     try:
-        connection = pymysql.connect(
-            host=RDS_HOST,
-            user=RDS_USER,
-            password=RDS_PASSWORD,
-            database=RDS_DATABASE
-        )
-        return connection
+        pool = READ_POOL if readonly else WRITE_POOL
+        return pool.connection()
     except Exception as e:
         logger.error(f"Database connection error: {e}")
         return None
 
-def get_ec2_metadata():
-    """
-    Retrieve EC2 instance metadata using IMDSv2.
-    Returns region, AZ, instance ID, and instance type.
-    """
-    try:
-        import requests
-        
-        # IMDSv2 requires a token first
+# Shared HTTP session for the instance metadata service (keeps the socket warm)
+_IMDS_SESSION = requests.Session()
+_IMDS_SESSION.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0))
+
+# IMDSv2 session token, reused until shortly before it expires
+IMDS_TOKEN_TTL = 21600
+_IMDS_TOKEN = None
+_IMDS_TOKEN_EXP = 0
+_IMDS_TOKEN_LOCK = threading.Lock()
+
+def _get_imds_token(timeout=1):
+    """Return a cached IMDSv2 token, requesting a new one when near expiry"""
+    global _IMDS_TOKEN, _IMDS_TOKEN_EXP
+
+    with _IMDS_TOKEN_LOCK:
+        if _IMDS_TOKEN and time.monotonic() < _IMDS_TOKEN_EXP - 60:
+            return _IMDS_TOKEN
+
         token_url = 'http://169.254.169.254/latest/api/token'
-        token_response = requests.put(
+        token_response = _IMDS_SESSION.put(
             token_url,
-            headers={'X-aws-ec2-metadata-token-ttl-seconds': '21600'},
-            timeout=1
+            headers={'X-aws-ec2-metadata-token-ttl-seconds': str(IMDS_TOKEN_TTL)},
+            timeout=timeout
         )
-        
+
         if token_response.status_code != 200:
             logger.error(f"Failed to get IMDSv2 token: {token_response.status_code}")
             raise Exception("Could not get metadata token")
-        
-        token = token_response.text
-        
-        # Now use the token to get metadata
-        metadata_url = 'http://169.254.169.254/latest/dynamic/instance-identity/document'
-        response = requests.get(
-            metadata_url,
-            headers={'X-aws-ec2-metadata-token': token},
-            timeout=1
-        )
-        
-        if response.status_code == 200:
-            metadata = response.json()
-            return {
-                'region': metadata.get('region', 'unknown'),
-                'availability_zone': metadata.get('availabilityZone', 'unknown'),
-                'instance_id': metadata.get('instanceId', 'unknown'),
-                'instance_type': metadata.get('instanceType', 'unknown')
-            }
-        else:
-            logger.error(f"Metadata service returned status {response.status_code}")
+
+        _IMDS_TOKEN = token_response.text
+        _IMDS_TOKEN_EXP = time.monotonic() + IMDS_TOKEN_TTL
+        return _IMDS_TOKEN
+
+# Re-probe interval after a failed IMDS probe, in seconds
+EC2_REPROBE_INTERVAL = 60
+_EC2_PROBED_AT = 0
+
+def _detect_ec2():
+    """
+    Probe IMDS with a short timeout, so that off EC2 (local dev, plain
+    containers) requests don't each wait on IMDS timeouts.
+    """
+    global ON_EC2, _EC2_PROBED_AT
+    _EC2_PROBED_AT = time.monotonic()
+    try:
+        _get_imds_token(timeout=0.2)
+        if not ON_EC2:
+            # Drop any 'unknown' metadata response cached while IMDS was unreachable
+            cache.delete('api_metadata')
+        ON_EC2 = True
+    except Exception:
+        logger.info("Instance metadata service not reachable - assuming not on EC2")
+        ON_EC2 = False
+    return ON_EC2
+
+def _on_ec2():
+    """
+    Whether IMDS is reachable. A failed probe is retried after
+    EC2_REPROBE_INTERVAL, so a brief IMDS stall at startup doesn't pin
+    'unknown' metadata for the life of the worker.
+    """
+    if not ON_EC2 and time.monotonic() - _EC2_PROBED_AT >= EC2_REPROBE_INTERVAL:
+        return _detect_ec2()
+    return ON_EC2
+
+ON_EC2 = False
+_detect_ec2()
+
+# Last successful results, served (tagged stale) when a backend blips
+_FALLBACK_CACHE = {}
+_FALLBACK_LOCK = threading.Lock()
+
+def serve_with_fallback(key, fetch_fn, fresh_ttl, stale_ttl):
+    """
+    Return (value, is_stale) for key.
+    Serves the stored value while younger than fresh_ttl, otherwise calls
+    fetch_fn. If fetch_fn fails, the last good value is served for up to
+    stale_ttl seconds before the error is re-raised.
+    """
+    now = time.monotonic()
+    with _FALLBACK_LOCK:
+        entry = _FALLBACK_CACHE.get(key)
+    
+    if entry and now - entry[1] < fresh_ttl:
+        return entry[0], False
+    
+    try:
+        value = fetch_fn()
     except Exception as e:
-        logger.error(f"Error getting EC2 metadata: {e}")
+        if entry and now - entry[1] < stale_ttl:
+            logger.warning(f"Serving stale {key} after error: {e}")
+            return entry[0], True
+        raise
     
+    with _FALLBACK_LOCK:
+        _FALLBACK_CACHE[key] = (value, time.monotonic())
+    return value, False
+
+UNKNOWN_METADATA = {
+    'region': 'unknown',
+    'availability_zone': 'unknown',
+    'instance_id': 'unknown',
+    'instance_type': 'unknown'
+}
+
+@functools.lru_cache(maxsize=1)
+def _fetch_ec2_metadata():
+    """
+    Retrieve EC2 instance metadata using IMDSv2.
+    Returns region, AZ, instance ID, and instance type.
+
+    Instance identity does not change for the life of the process,
+    so the result is cached after the first call. Failures raise and
+    are therefore not cached.
+    """
+    # IMDSv2 requires a token first
+    token = _get_imds_token()
+    
+    # Now use the token to get metadata
+    metadata_url = 'http://169.254.169.254/latest/dynamic/instance-identity/document'
+    response = _IMDS_SESSION.get(
+        metadata_url,
+        headers={'X-aws-ec2-metadata-token': token},
+        timeout=1
+    )
+    
+    if response.status_code != 200:
+        raise Exception(f"Metadata service returned status {response.status_code}")
+    
+    metadata = response.json()
     return {
-        'region': 'unknown',
-        'availability_zone': 'unknown',
-        'instance_id': 'unknown',
-        'instance_type': 'unknown'
+        'region': metadata.get('region', 'unknown'),
+        'availability_zone': metadata.get('availabilityZone', 'unknown'),
+        'instance_id': metadata.get('instanceId', 'unknown'),
+        'instance_type': metadata.get('instanceType', 'unknown')
     }
 
-@app.route('/', methods=['GET'])
-def index():
+def get_ec2_metadata():
     """
-    Home page - returns HTML page with instance metadata
+    Get instance metadata as (metadata, is_stale).
+    Off EC2 (IMDS probe failed) returns 'unknown' values with is_stale False.
+    On EC2, an IMDS error falls back to the last known metadata, or 'unknown'
+    values, with is_stale True.
     """
-    metadata = get_ec2_metadata()
+    if not _on_ec2():
+        return UNKNOWN_METADATA, False
     
-    html_content = f"""
+    try:
+        return serve_with_fallback('ec2_metadata', _fetch_ec2_metadata,
+                                   fresh_ttl=0, stale_ttl=86400)
+    except Exception as e:
+        logger.error(f"Error getting EC2 metadata: {e}")
+        return UNKNOWN_METADATA, True
+
+INDEX_TEMPLATE = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -144,45 +303,169 @@ def index():
             <h1>AWS EC2 Instance Information</h1>
             <div class="info">
                 <span class="label">Region:</span>
-                <span class="value">{metadata.get('region', 'N/A')}</span>
+                <span class="value">{region}</span>
             </div>
             <div class="info">
                 <span class="label">Availability Zone:</span>
-                <span class="value">{metadata.get('availability_zone', 'N/A')}</span>
+                <span class="value">{availability_zone}</span>
             </div>
             <div class="info">
                 <span class="label">Instance ID:</span>
-                <span class="value">{metadata.get('instance_id', 'N/A')}</span>
+                <span class="value">{instance_id}</span>
             </div>
             <div class="info">
                 <span class="label">Instance Type:</span>
-                <span class="value">{metadata.get('instance_type', 'N/A')}</span>
+                <span class="value">{instance_type}</span>
             </div>
         </div>
     </body>
     </html>
     """
-    return html_content, 200, {'Content-Type': 'text/html'}
 
+@functools.lru_cache(maxsize=4)
+def _render_index_html(**metadata):
+    """
+    Render the home page once per distinct set of instance metadata.
+    Returns (html, etag, gzipped_html, gzipped_etag).
+    """
+    html = INDEX_TEMPLATE.format(**metadata).encode('utf-8')
+    gzipped = gzip.compress(html, mtime=0)
+    return html, hashlib.sha1(html).hexdigest(), gzipped, hashlib.sha1(gzipped).hexdigest()
+
+@app.route('/', methods=['GET'])
+def index():
+    """
+    Home page - returns HTML page with instance metadata
+    """
+    metadata, stale = get_ec2_metadata()
+    html, etag, gzipped, gzipped_etag = _render_index_html(**metadata)
+    
+    # Serve the pre-compressed page directly; Compress skips encoded responses
+    if request.accept_encodings['gzip']:
+        response = Response(gzipped, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(gzipped_etag)
+    else:
+        response = Response(html, mimetype='text/html')
+        response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    if stale:
+        response.headers['X-Stale'] = '1'
+    return response.make_conditional(request)
+
+def _is_ok_response(rv):
+    """Only cache successful, non-stale view results"""
+    response, status = rv if isinstance(rv, tuple) else (rv, rv.status_code)
+    return status == 200 and 'X-Stale' not in response.headers
+
+# Off EC2 the cache is bypassed, so each request re-checks _on_ec2() and a
+# failed startup probe can't pin 'unknown' metadata for the cache timeout
 @app.route('/api/metadata', methods=['GET'])
+@cache.cached(timeout=3600, key_prefix='api_metadata', response_filter=_is_ok_response,
+              unless=lambda: not _on_ec2())
 def api_metadata():
     """
     REST API endpoint - returns instance metadata as JSON
     """
-    metadata = get_ec2_metadata()
-    return jsonify(metadata), 200
+    metadata, stale = get_ec2_metadata()
+    response = jsonify(metadata)
+    if stale:
+        response.headers['X-Stale'] = '1'
+    return response, 200
+
+HEALTH_BODY = b'{"status":"healthy"}'
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """
     Health check endpoint for load balancer
     """
-    return jsonify({'status': 'healthy'}), 200
+    return Response(HEALTH_BODY, mimetype='application/json')
+
+ADMIN_ALLOWED_ADDRS = ('127.0.0.1', '::1')
+
+@app.route('/admin/refresh-metadata', methods=['POST'])
+def refresh_metadata():
+    """
+    Drop the cached instance metadata (e.g. after a stop/start)
+    
+    Only accepted from localhost. Caches are per process, so this refreshes
+    the single gunicorn worker that handles the request; reload gunicorn
+    (kill -HUP) to refresh every worker.
+    """
+    if request.remote_addr not in ADMIN_ALLOWED_ADDRS:
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    _fetch_ec2_metadata.cache_clear()
+    cache.delete('api_metadata')
+    if not ON_EC2:
+        _detect_ec2()
+    metadata, stale = get_ec2_metadata()
+    logger.info("Refreshed EC2 metadata cache")
+    response = jsonify(metadata)
+    if stale:
+        response.headers['X-Stale'] = '1'
+    return response, 200
 
 # ============================================================
 # IMAGE OPERATIONS ENDPOINTS
 # ============================================================
 
+# Allowed image names; checked before any S3 or RDS call is made
+_IMAGE_NAME_MATCH = re.compile(r'[A-Za-z0-9_.\-]{1,255}').fullmatch
+
+def is_valid_image_name(name):
+    """Check an image name is safe to use as an S3 key and SQL parameter"""
+    return bool(name) and _IMAGE_NAME_MATCH(name) is not None
+
+def _store_image_metadata(filename, file_size, file_extension, s3_key):
+    """Upsert the image_metadata row and commit straight away"""
+    connection = get_db_connection()
+    if not connection:
+        raise Exception('Database connection failed')
+    
+    try:
+        cursor = connection.cursor()
+        
+        # Relies on the uq_image_name key (migrations/001_image_metadata_indexes.sql)
+        sql = """
+        INSERT INTO image_metadata 
+        (image_name, file_size, file_extension, s3_key)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            file_size = VALUES(file_size),
+            file_extension = VALUES(file_extension),
+            s3_key = VALUES(s3_key),
+            last_update = NOW()
+        """
+        
+        cursor.execute(sql, (filename, file_size, file_extension, s3_key))
+        connection.commit()
+        cursor.close()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    
+    logger.info(f"Stored metadata in RDS: {filename}")
+    cache.delete('images_list')
+
+def _send_upload_message(message_body):
+    """Queue the upload notification for the SNS Lambda"""
+    sqs_client.send_message(
+        QueueUrl=SQS_QUEUE_URL,
+        MessageBody=orjson.dumps(message_body).decode(),
+        MessageAttributes={
+            'Extension': {
+                'StringValue': message_body['file_extension'],
+                'DataType': 'String'
+            }
+        }
+    )
+    
+    logger.info(f"Sent SQS message for: {message_body['image_name']}")
+
 @app.route('/api/images/upload', methods=['POST'])
 def upload_image():
     """
@@ -201,63 +484,42 @@ def upload_image():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
+        if not is_valid_image_name(file.filename):
+            return jsonify({'error': 'Invalid image name'}), 400
+        
         # Get file details
         filename = file.filename
-        file_extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-        file_content = file.read()
-        file_size = len(file_content)
-        
-        # Upload to S3
+        file_extension = os.path.splitext(filename)[1][1:]
+        if not file_extension.islower():
+            file_extension = file_extension.lower()
+        file.stream.seek(0, os.SEEK_END)
+        file_size = file.stream.tell()
+        file.stream.seek(0)
+        
+        # Stream to S3 (multipart for large files) without reading it into memory
         s3_key = f'images/{filename}'
-        s3_client.put_object(
-            Bucket=S3_BUCKET,
-            Key=s3_key,
-            Body=file_content
+        extra_args = {'ContentType': file.mimetype} if file.mimetype else None
+        s3_client.upload_fileobj(
+            file.stream,
+            S3_BUCKET,
+            s3_key,
+            ExtraArgs=extra_args
         )
         
         logger.info(f"Uploaded image to S3: {s3_key}")
         
-        # Store metadata in RDS
-        connection = get_db_connection()
-        if not connection:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = connection.cursor()
-        
-        sql = """
-        INSERT INTO image_metadata 
-        (image_name, file_size, file_extension, s3_key)
-        VALUES (%s, %s, %s, %s)
-        """
-        
-        cursor.execute(sql, (filename, file_size, file_extension, s3_key))
-        connection.commit()
-        cursor.close()
-        connection.close()
-        
-        logger.info(f"Stored metadata in RDS: {filename}")
-
-        # Send message to SQS
         message_body = {
             'image_name': filename,
             'file_size': file_size,
             'file_extension': file_extension,
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
             's3_key': s3_key
         }
         
-        sqs_client.send_message(
-            QueueUrl=SQS_QUEUE_URL,
-            MessageBody=json.dumps(message_body),
-            MessageAttributes={
-                'Extension': {
-                    'StringValue': file_extension,
-                    'DataType': 'String'
-                }
-            }
-        )
-        
-        logger.info(f"Sent SQS message for: {filename}")
+        # Store metadata only once the object is in S3, so the RDS transaction
+        # spans just the upsert and commit; notify subscribers only once both succeed
+        _store_image_metadata(filename, file_size, file_extension, s3_key)
+        _send_upload_message(message_body)
         
         return jsonify({
             'success': True,
@@ -271,6 +533,17 @@ def upload_image():
         logger.error(f"Upload error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _iter_s3_body(body, chunk_size=65536):
+    """Yield an S3 StreamingBody in fixed-size chunks, closing it when done"""
+    try:
+        while True:
+            data = body.read(chunk_size)
+            if not data:
+                return
+            yield data
+    finally:
+        body.close()
+
 @app.route('/api/images/download/<image_name>', methods=['GET'])
 def download_image(image_name):
     """
@@ -278,6 +551,9 @@ def download_image(image_name):
     
     Returns: File download
     """
+    if not is_valid_image_name(image_name):
+        return jsonify({'error': 'Invalid image name'}), 400
+    
     try:
         # Get file from S3
         s3_key = f'images/{image_name}'
@@ -285,11 +561,14 @@ def download_image(image_name):
         
         logger.info(f"Downloaded image from S3: {image_name}")
         
-        # Return file
-        return send_file(
-            BytesIO(response['Body'].read()),
-            download_name=image_name,
-            as_attachment=True
+        # Stream file to the client without buffering it in memory
+        return Response(
+            stream_with_context(_iter_s3_body(response['Body'])),
+            headers={
+                'Content-Disposition': f'attachment; filename="{image_name}"',
+                'Content-Length': str(response['ContentLength']),
+                'Content-Type': response.get('ContentType', 'application/octet-stream')
+            }
         )
     
     except s3_client.exceptions.NoSuchKey:
@@ -306,8 +585,11 @@ def get_image_metadata(image_name):
     
     Returns: JSON with name, size_bytes, extension, last_update
     """
+    if not is_valid_image_name(image_name):
+        return jsonify({'error': 'Invalid image name'}), 400
+    
     try:
-        connection = get_db_connection()
+        connection = get_db_connection(readonly=True)
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
         
@@ -349,22 +631,34 @@ def get_random_image_metadata():
     Returns: JSON with name, size_bytes, extension, last_update
     """
     try:
-        connection = get_db_connection()
+        connection = get_db_connection(readonly=True)
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
         
         cursor = connection.cursor(pymysql.cursors.DictCursor)
         
-        # Get random image
+        # Pick a random offset instead of ORDER BY RAND(), which sorts the whole table.
+        # On the shared write pool both queries see one REPEATABLE READ snapshot. On a
+        # replica pool (RDS_READ_HOST, autocommit) they don't, so rows deleted in between
+        # can leave the offset past the end; retry once with a fresh count.
         sql = """
         SELECT image_name, file_size, file_extension, last_update
         FROM image_metadata
-        ORDER BY RAND()
-        LIMIT 1
+        LIMIT 1 OFFSET %s
         """
         
-        cursor.execute(sql)
-        result = cursor.fetchone()
+        result = None
+        for _ in range(2):
+            cursor.execute("SELECT COUNT(*) AS total FROM image_metadata")
+            total = cursor.fetchone()['total']
+            if not total:
+                break
+            
+            cursor.execute(sql, (random.randrange(total),))
+            result = cursor.fetchone()
+            if result:
+                break
+        
         cursor.close()
         connection.close()
         
@@ -392,6 +686,9 @@ def delete_image(image_name):
     
     Returns: JSON with success status
     """
+    if not is_valid_image_name(image_name):
+        return jsonify({'error': 'Invalid image name'}), 400
+    
     try:
         # Delete from RDS first
         connection = get_db_connection()
@@ -414,6 +711,7 @@ def delete_image(image_name):
         connection.close()
         
         logger.info(f"Deleted metadata from RDS: {image_name}")
+        cache.delete('images_list')
         
         # Delete from S3
         s3_key = f'images/{image_name}'
@@ -430,44 +728,56 @@ def delete_image(image_name):
         logger.error(f"Delete error: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/images', methods=['GET'])
-def list_images():
-    """
-    List all images with their metadata
+def _fetch_image_list():
+    """Read all image metadata rows, newest first"""
+    connection = get_db_connection(readonly=True)
+    if not connection:
+        raise Exception('Database connection failed')
     
-    Returns: JSON array of all images
+    # Server-side cursor: rows are converted as they arrive instead of
+    # buffering the raw result set on the client first
+    cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+    
+    sql = """
+    SELECT image_name, file_size, file_extension, last_update
+    FROM image_metadata
+    ORDER BY last_update DESC
     """
+    
     try:
-        connection = get_db_connection()
-        if not connection:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        
-        sql = """
-        SELECT image_name, file_size, file_extension, last_update
-        FROM image_metadata
-        ORDER BY last_update DESC
-        """
-        
         cursor.execute(sql)
-        results = cursor.fetchall()
-        cursor.close()
-        connection.close()
-        
-        images = [
+        return [
             {
                 'name': row['image_name'],
                 'size_bytes': row['file_size'],
                 'extension': row['file_extension'],
                 'last_update': row['last_update'].isoformat()
             }
-            for row in results
+            for row in cursor
         ]
+    finally:
+        cursor.close()
+        connection.close()
+
+@app.route('/api/images', methods=['GET'])
+@cache.cached(timeout=5, key_prefix='images_list', response_filter=_is_ok_response)
+def list_images():
+    """
+    List all images with their metadata
+    
+    Returns: JSON array of all images (X-Stale: 1 if served from the
+    last good result after a database error)
+    """
+    try:
+        images, stale = serve_with_fallback('images_list', _fetch_image_list,
+                                            fresh_ttl=0, stale_ttl=300)
         
         logger.info(f"Retrieved {len(images)} images from database")
         
-        return jsonify({'images': images, 'total': len(images)}), 200
+        response = jsonify({'images': images, 'total': len(images)})
+        if stale:
+            response.headers['X-Stale'] = '1'
+        return response, 200
     
     except Exception as e:
         logger.error(f"List images error: {e}")
@@ -526,15 +836,16 @@ def unsubscribe_email():
 def check_consistency():
     """Trigger Lambda consistency check synchronously"""
     try:
-        lambda_client = boto3.client('lambda', region_name='us-east-1')
-        response = lambda_client.invoke(FunctionName='flask-app-DataConsistencyFunction', InvocationType='RequestResponse', Payload=json.dumps({'source': 'web-app', 'httpMethod': 'GET'}))
-        result = json.loads(response['Payload'].read())
-        logger.info(f"Consistency check result: {json.dumps(result)}")
-        return jsonify(result), 200
+        response = lambda_client.invoke(FunctionName='flask-app-DataConsistencyFunction', InvocationType='RequestResponse', Payload=orjson.dumps({'source': 'web-app', 'httpMethod': 'GET'}))
+        # Return the Lambda's JSON payload verbatim instead of parsing and re-encoding it
+        payload_bytes = response['Payload'].read()
+        logger.info(f"Consistency check result: {payload_bytes[:256].decode(errors='replace')}")
+        return Response(payload_bytes, status=200, mimetype='application/json')
     except Exception as e:
         logger.error(f"Consistency check error: {e}")
         return jsonify({'error': str(e)}), 500
         
 if __name__ == '__main__':
+    # Local development only - production is served by gunicorn + gevent
     # Run on 0.0.0.0 so it's accessible from outside the instance
     app.run(host='0.0.0.0', port=5000, debug=False)
@@ -34,7 +34,7 @@ echo "Installing Python dependencies..."
 pip3 install -r requirements.txt
 
 echo "Starting Flask application..."
-nohup python3 app.py > app.log 2>&1 &
+nohup python3 -m gunicorn -k gevent -w 4 --worker-connections 200 -b 0.0.0.0:5000 app:app > app.log 2>&1 &
 
 echo "Flask application started on port 5000"
 EOF
@@ -51,7 +51,7 @@ After=network.target
 Type=simple
 User=ubuntu
 WorkingDirectory=/opt/flask-app
-ExecStart=/usr/bin/python3 /opt/flask-app/app.py
+ExecStart=/usr/bin/python3 -m gunicorn -k gevent -w 4 --worker-connections 200 -b 0.0.0.0:5000 app:app
 Restart=always
 RestartSec=10
 
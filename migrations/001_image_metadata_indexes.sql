@@ -0,0 +1,12 @@
+-- Indexes for image_metadata lookups
+--
+-- image_name is the natural key: lookups and deletes filter on it, and
+-- uploads upsert on it (INSERT ... ON DUPLICATE KEY UPDATE).
+-- last_update backs the newest-first ORDER BY in the image list.
+--
+-- Remove duplicate image_name rows before applying, otherwise the
+-- UNIQUE key cannot be created.
+
+ALTER TABLE image_metadata
+  ADD UNIQUE KEY uq_image_name (image_name),
+  ADD KEY ix_last_update (last_update DESC);
@@ -1,4 +1,5 @@
 import json
+import orjson
 import boto3
 import logging
 import os
@@ -11,59 +12,83 @@ sns_client = boto3.client('sns')
 
 SNS_TOPIC_ARN = os.getenv('SNS_TOPIC_ARN')
 
-def lambda_handler(event, context):
-    """
-    Triggered by SQS queue (polling invocation)
-    Processes image upload messages and publishes to SNS
-    """
-    
-    logger.info(f"Received event from SQS: {json.dumps(event)}")
-    
-    records = event.get('Records', [])
-    
-    for record in records:
-        try:
-            message_body = json.loads(record['body'])
-            
-            image_name = message_body['image_name']
-            file_size = message_body['file_size']
-            extension = message_body['file_extension']
-            timestamp = message_body['timestamp']
-            
-            logger.info(f"Processing image upload: {image_name}")
-            
-            sns_message = f"""Image Upload Notification
+# SNS PublishBatch accepts at most 10 entries per call
+SNS_BATCH_SIZE = 10
+
+SNS_MESSAGE_TEMPLATE = """Image Upload Notification
 ========================
 
 An image has been uploaded to the image repository.
 
 Image Details:
 - Name: {image_name}
-- Size: {file_size} bytes ({file_size / 1024:.2f} KB)
+- Size: {file_size} bytes ({file_size_kb:.2f} KB)
 - Extension: {extension}
 - Uploaded: {timestamp}
 
 Thank you for using our image upload service!"""
-            
-            sns_response = sns_client.publish(
+
+def build_publish_entry(entry_id, record):
+    """Build an SNS PublishBatch entry from an SQS record"""
+    message_body = orjson.loads(record['body'])
+    
+    image_name = message_body['image_name']
+    file_size = message_body['file_size']
+    extension = message_body['file_extension']
+    
+    logger.info(f"Processing image upload: {image_name}")
+    
+    sns_message = SNS_MESSAGE_TEMPLATE.format_map({
+        'image_name': image_name,
+        'file_size': file_size,
+        'file_size_kb': file_size / 1024,
+        'extension': extension,
+        'timestamp': message_body['timestamp']
+    })
+    
+    return {
+        'Id': entry_id,
+        'Subject': f'Image Upload: {image_name}',
+        'Message': sns_message,
+        'MessageAttributes': {
+            'Extension': {
+                'DataType': 'String',
+                'StringValue': extension
+            }
+        }
+    }
+
+def lambda_handler(event, context):
+    """
+    Triggered by SQS queue (polling invocation)
+    Processes image upload messages and publishes to SNS in batches
+    """
+    
+    logger.info(f"Received event from SQS: {json.dumps(event)}")
+    
+    records = event.get('Records', [])
+    
+    try:
+        entries = [build_publish_entry(str(i), record) for i, record in enumerate(records)]
+        
+        for start in range(0, len(entries), SNS_BATCH_SIZE):
+            sns_response = sns_client.publish_batch(
                 TopicArn=SNS_TOPIC_ARN,
-                Subject=f'Image Upload: {image_name}',
-                Message=sns_message,
-                MessageAttributes={
-                    'Extension': {
-                        'DataType': 'String',
-                        'StringValue': extension
-                    }
-                }
+                PublishBatchRequestEntries=entries[start:start + SNS_BATCH_SIZE]
             )
             
-            logger.info(f"Published SNS message: {sns_response['MessageId']}")
+            for success in sns_response.get('Successful', []):
+                logger.info(f"Published SNS message: {success['MessageId']}")
             
-        except Exception as e:
-            logger.error(f"Error processing message: {e}", exc_info=True)
-            raise
+            failed = sns_response.get('Failed', [])
+            if failed:
+                raise Exception(f"Failed to publish {len(failed)} SNS messages: {failed}")
+        
+    except Exception as e:
+        logger.error(f"Error processing message: {e}", exc_info=True)
+        raise
     
     return {
         'statusCode': 200,
         'body': json.dumps(f'Processed {len(records)} messages')
-    }
\ No newline at end of file
+    }